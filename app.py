@@ -1,374 +1,487 @@
-import streamlit as st
-from openai import OpenAI
+import html
+import re
 
-# -------------------------
-# Sidebar: API Key Handling
-# -------------------------
-st.sidebar.subheader("🔑 OpenAI API Key")
-
-if "api_key" not in st.session_state:
-    st.session_state["api_key"] = ""
+import streamlit as st
 
-api_key_input = st.sidebar.text_input(
-    "Enter your OpenAI API key", type="password", value=st.session_state["api_key"]
+from pipeline import (
+    SECTION_ORDER,
+    embed,
+    embed_many,
+    fetch_batch,
+    generate_many,
+    generate_plan,
+    generate_sections,
+    get_client,
+    get_event_loop,
+    plan_titles,
+    plan_with_examples,
+    semantic_key_text,
+    semantic_lookup,
+    semantic_store,
+    semantic_store_many,
+    submit_batch,
 )
+from prompts import NO_SAMPLES_TEMPLATES, TEMPLATES
 
-save_key = st.sidebar.checkbox("Remember for this session", value=True)
-
-if api_key_input:
-    if save_key:
-        st.session_state["api_key"] = api_key_input
-    api_key = api_key_input
-else:
-    api_key = st.session_state["api_key"]
-
-client = None
-if api_key:
-    client = OpenAI(api_key=api_key)
-else:
-    st.sidebar.warning("⚠️ Please enter your OpenAI API key to continue.")
 
 # -------------------------
-# App UI
+# Sidebar: API Key Handling
 # -------------------------
-st.title("📈 AI-Powered SEO Content Generator (India-Focused)")
-st.write("Generate SEO-ready articles with metadata, keywords, suggested headings, FAQs, and inline samples.")
+def sidebar_api_key():
+    st.sidebar.subheader("🔑 OpenAI API Key")
 
-templates = {
-    "Resume": "Write an article with resume writing guide, inline resume samples, and FAQs.",
-    "Cover Letter": "Write a cover letter guide with inline cover letter samples, templates, and FAQs.",
-    "Generic": "Generate a comprehensive, well-structured article with examples and FAQs.",
-    "How to Become": "Write a step-by-step guide on how to become [ROLE], with skills, salary insights, and FAQs.",
-    "Job Description": "Write a detailed job description with structured inline sections, India-specific examples, and salary insights.",
-}
+    if "api_key" not in st.session_state:
+        st.session_state["api_key"] = ""
 
-template_choice = st.selectbox("📄 Choose Template", list(templates.keys()))
-topic = st.text_input("🎯 Enter Topic / Primary Keyword", "")
-custom_prompt = st.text_area(
-    "✍️ Customize Prompt (optional)", value=templates[template_choice], height=120
-)
+    api_key_input = st.sidebar.text_input(
+        "Enter your OpenAI API key", type="password", value=st.session_state["api_key"]
+    )
 
-generate_button = st.button("🚀 Generate Optimized Content")
+    save_key = st.sidebar.checkbox("Remember for this session", value=True)
+    use_cache = st.sidebar.checkbox("Use response cache", value=True)
 
-# -------------------------
-# Content Generation Logic
-# -------------------------
-if generate_button:
-    if not client:
-        st.error("❌ Please enter your OpenAI API key in the sidebar.")
-    elif not topic.strip():
-        st.error("❌ Please enter a topic/primary keyword.")
+    if api_key_input:
+        if save_key:
+            st.session_state["api_key"] = api_key_input
+        api_key = api_key_input
     else:
-        with st.spinner("✨ Generating content..."):
-            try:
-                # 1. Generate 5 SERP-style titles
-                title_prompt = f"""
-                Generate 5 SEO-friendly article titles for: "{topic}".
-                Titles must mimic top-ranking Google SERPs.
-                Keep them concise, engaging, and India-specific.
-                """
-                title_response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": title_prompt}],
-                    temperature=0.7,
-                    max_tokens=200,
-                )
-                titles_text = title_response.choices[0].message.content
-                titles_list = [t.strip("-•0123456789. ") for t in titles_text.split("\n") if t.strip()]
-
-                selected_title = st.selectbox("📝 Select Article Title", titles_list)
-
-                if selected_title:
-                    # 2. SEO Meta (Title & Description)
-                    meta_prompt = f"""
-                    Generate an SEO meta title and meta description for the article titled: "{selected_title}".
-                    Requirements:
-                    - Meta title: ≤60 characters, engaging, India-focused
-                    - Meta description: ≤160 characters, concise, includes primary keyword: "{topic}"
-                    - Human-like, plagiarism-free
-                    Format:
-                    Meta Title: ...
-                    Meta Description: ...
-                    """
-                    meta_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": meta_prompt}],
-                        temperature=0.7,
-                        max_tokens=200,
-                    )
-                    meta_text = meta_response.choices[0].message.content
-
-                    # 3. Suggested Headings (H2/H3)
-                    headings_prompt = f"""
-                    Generate a suggested list of H2 and H3 headings for the article titled: "{selected_title}".
-                    Requirements:
-                    - Use primary keyword: "{topic}" in at least one heading
-                    - Include India-specific examples where relevant
-                    - Structured for SEO optimization
-                    - Provide headings only, in list format
-                    """
-                    headings_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": headings_prompt}],
-                        temperature=0.7,
-                        max_tokens=300,
-                    )
-                    headings_text = headings_response.choices[0].message.content
-
-                    # 4. SEO Keywords
-                    keywords_prompt = f"""
-                    Generate a list of 5–10 SEO keywords for the topic: "{topic}".
-                    Requirements:
-                    - Include primary, secondary, and long-tail keywords
-                    - India-specific context
-                    - Format as comma-separated list
-                    """
-                    keywords_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": keywords_prompt}],
-                        temperature=0.7,
-                        max_tokens=200,
-                    )
-                    keywords_text = keywords_response.choices[0].message.content
-
-                    # 5. AI Overview Summary
-                    summary_prompt = f"""
-                    Write a concise, direct answer summary (50–80 words) for the topic: "{topic}".
-                    Use the selected article title: "{selected_title}".
-                    Ensure it is human-like, plagiarism-free, and India-focused.
-                    """
-                    summary_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": summary_prompt}],
-                        temperature=0.7,
-                        max_tokens=200,
-                    )
-                    ai_summary = summary_response.choices[0].message.content
-
-                    # 6. Full Article
-                    article_prompt = f"""
-                    Generate a detailed article on "{topic}" with the title "{selected_title}".
-                    Requirements:
-                    - Clear introduction
-                    - Structured subheadings
-                    - Examples and FAQs
-                    - Bullet points or checklists
-                    - Human-like, plagiarism-free
-                    - India-contextualized
-                    - Follow this style: {custom_prompt}
-                    """
-                    article_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": article_prompt}],
-                        temperature=0.7,
-                        max_tokens=1500,
-                    )
-                    article = article_response.choices[0].message.content
-
-                    # 7. FAQs
-                    faq_prompt = f"""
-                    Generate 5–7 FAQs with concise answers for the topic: "{topic}".
-                    - Relevant to Indian readers
-                    - Human-like, plagiarism-free
-                    - Actionable and informative
-                    Format: Q: ... A: ...
-                    """
-                    faq_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": faq_prompt}],
-                        temperature=0.7,
-                        max_tokens=600,
-                    )
-                    faq_text = faq_response.choices[0].message.content
-
-                    # 8. Examples/Samples (inline)
-                    if template_choice == "Resume":
-                        examples_prompt = f"""
-                        Generate 3 detailed resume samples for "{topic}".
-                        Use fixed inline headings:
-
-                        ### Fresher Resume Sample
-                        [Full fresher resume]
-
-                        ### Mid-level Resume Sample
-                        [Full mid-level resume]
-
-                        ### Experienced Resume Sample
-                        [Full experienced resume]
-
-                        Context: Indian job market, human-like, plagiarism-free.
-                        """
-                    elif template_choice == "Cover Letter":
-                        examples_prompt = f"""
-                        Generate 3 detailed cover letter samples for "{topic}".
-                        Use fixed inline headings:
-
-                        ### Fresher Cover Letter Sample
-                        [Full fresher cover letter]
-
-                        ### Mid-level Cover Letter Sample
-                        [Full mid-level cover letter]
-
-                        ### Experienced Cover Letter Sample
-                        [Full experienced cover letter]
-
-                        Context: Indian job market, human-like, plagiarism-free.
-                        """
-                    elif template_choice == "Job Description":
-                        examples_prompt = f"""
-                        Generate a detailed Job Description for "{topic}".
-                        Use these fixed inline headings:
-
-                        ### Job Title
-                        [Insert job title]
+        api_key = st.session_state["api_key"]
 
-                        ### Job Summary
-                        [Short overview]
+    if not api_key:
+        st.sidebar.warning("⚠️ Please enter your OpenAI API key to continue.")
+    return api_key, use_cache
 
-                        ### Key Responsibilities
-                        [6–8 bullet points]
 
-                        ### Required Skills & Qualifications
-                        [Technical + soft skills, education]
-
-                        ### Salary Insights (India-specific)
-                        [Fresher / Mid-level / Experienced INR ranges]
-
-                        ### About the Company (Optional)
-                        [Sample company description, India-focused]
-
-                        Context: Human-like, plagiarism-free, India-specific.
-                        """
-                    else:
-                        examples_prompt = f"""
-                        Generate 3–4 distinct examples for the template "{template_choice}" on "{topic}".
-                        Ensure India-specific, human-like, plagiarism-free.
-                        """
-
-                    examples_response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": examples_prompt}],
-                        temperature=0.7,
-                        max_tokens=1200,
-                    )
-                    examples_text = examples_response.choices[0].message.content
-
-                    # -------------------------
-                    # Display Content
-                    # -------------------------
-                    st.success("✅ Content Generated Successfully!")
-
-                    st.subheader("📝 SEO Meta")
-                    st.markdown(meta_text)
-
-                    st.subheader("🏷️ Suggested SEO Keywords")
-                    st.markdown(keywords_text)
-
-                    st.subheader("🗂️ Suggested Headings (H2/H3)")
-                    st.markdown(headings_text)
+# -------------------------
+# Content Generation Logic
+# -------------------------
+# Display order of the result sections.
+SECTION_HEADINGS = {
+    "meta": "📝 SEO Meta",
+    "keywords": "🏷️ Suggested SEO Keywords",
+    "headings": "🗂️ Suggested Headings (H2/H3)",
+    "summary": "🔎 AI Overview Answer Summary",
+    "article": "📄 Full Article",
+    "faq": "❓ FAQs",
+    "examples": "📚 {template} Samples / Templates",
+}
 
-                    st.subheader("🔎 AI Overview Answer Summary")
-                    st.markdown(f"> {ai_summary}")
 
-                    st.subheader("📄 Full Article")
-                    st.markdown(article)
+def result_layout(template_choice):
+    # Lay out every section up front so results land in place as each call finishes.
+    shows = {}
+    for name, heading in SECTION_HEADINGS.items():
+        if name == "examples" and template_choice in NO_SAMPLES_TEMPLATES:
+            shows[name] = lambda text: None
+            continue
+        st.subheader(heading.format(template=template_choice))
+        shows[name] = st.empty().markdown
+    summary_show = shows["summary"]
+    shows["summary"] = lambda text: summary_show(f"> {text}")
+    return shows
+
+
+async def plan_content(client, topic, template_choice, custom_prompt, use_cache):
+    with st.spinner("✨ Generating titles..."):
+        # 0. Semantic cache lookup: one cheap embedding instead of the whole pipeline
+        query_embedding = None
+        bundle = None
+        examples_task = None
+        if use_cache:
+            query_embedding = await embed(
+                client, semantic_key_text(topic, template_choice, custom_prompt)
+            )
+            bundle = semantic_lookup(query_embedding)
+
+        # 1. Plan 5 SERP-style titles with their short sections
+        if bundle:
+            titles_list = bundle["titles"]
+            # Bulk results carry no plan; they have a single title and never need one.
+            plan = bundle.get("plan")
+        else:
+            plan, examples_task = await plan_with_examples(
+                client, topic, template_choice, custom_prompt, use_cache
+            )
+            titles_list = plan_titles(plan)
+
+    return {
+        "query_embedding": query_embedding,
+        "bundle": bundle,
+        "plan": plan,
+        "titles": titles_list,
+        "examples_task": examples_task,
+        # Finished sections per title, so re-renders make no API calls.
+        "results": {},
+    }
+
+
+async def generate(
+    client, planned, selected_title, topic, template_choice, custom_prompt, use_cache
+):
+    bundle = planned["bundle"]
+    status = st.empty()
+    shows = result_layout(template_choice)
+    result = planned["results"].get(selected_title)
+    if result is None and bundle and bundle["selected_title"] == selected_title:
+        result = {"title": selected_title, **dict(zip(SECTION_ORDER, bundle["sections"]))}
+    if result is not None:
+        for name in SECTION_ORDER:
+            shows[name](result[name])
+        status.success("✅ Content Generated Successfully!")
+        planned["results"][selected_title] = result
+        return result
+
+    # 2–8. Short sections from the plan; article and samples stream in
+    status.info("✨ Generating content...")
+    if planned["plan"] is None:
+        planned["plan"] = await generate_plan(
+            client, topic, template_choice, custom_prompt, use_cache
+        )
+    sections = await generate_sections(
+        client,
+        planned["plan"],
+        topic,
+        selected_title,
+        template_choice,
+        custom_prompt,
+        shows,
+        use_cache,
+        planned["examples_task"],
+    )
+    status.success("✅ Content Generated Successfully!")
+
+    if planned["query_embedding"] is not None and not bundle:
+        semantic_store(
+            planned["query_embedding"],
+            {
+                "titles": planned["titles"],
+                "plan": planned["plan"],
+                "selected_title": selected_title,
+                "sections": [sections[name] for name in SECTION_ORDER],
+            },
+        )
+    result = {"title": selected_title, **sections}
+    planned["results"][selected_title] = result
+    return result
 
-                    st.subheader("❓ FAQs")
-                    st.markdown(faq_text)
 
-                    st.subheader(f"📚 {template_choice} Samples / Templates")
-                    st.markdown(examples_text)
+# -------------------------
+# Download Builders
+# -------------------------
+# Constant parts of the HTML export, built once at import.
+HTML_HEAD = '<html>\n<head>\n<meta charset="UTF-8">\n<title>'
+HTML_CHECKLIST = """<h2>Checklist</h2>
+<ul>
+<li>Step 1: Research keywords</li>
+<li>Step 2: Optimize headings & subheadings</li>
+<li>Step 3: Add bullet points & checklists</li>
+<li>Step 4: Include FAQs</li>
+<li>Step 5: Review content for clarity & accuracy</li>
+</ul>
+</body>
+</html>
+"""
 
-                    st.subheader("✅ Content Quality Checklist")
-                    st.write(
-                        """
-                        - [ ] Step 1: Research keywords  
-                        - [ ] Step 2: Optimize headings & subheadings  
-                        - [ ] Step 3: Add bullet points & checklists  
-                        - [ ] Step 4: Include FAQs  
-                        - [ ] Step 5: Review content for clarity & accuracy  
-                        """
-                    )
 
-                    # -------------------------
-                    # Download Buttons
-                    # -------------------------
-                    download_content = f"""
-SEO Meta:
-{meta_text}
+NON_WORD_RE = re.compile(r"\W+")
+
+
+def slugify(text):
+    # Filesystem- and URL-safe download name; punctuation in topics used to break it.
+    return NON_WORD_RE.sub("_", text.strip()).strip("_").lower() or "content"
+
+
+def to_html(text, br=True):
+    # LLM output is untrusted: escape it before it goes into the export. html.escape
+    # plus replace are C-level passes; a str.translate table was far slower here.
+    text = html.escape(text, quote=False)
+    return text.replace("\n", "<br>") if br else text
+
+
+@st.cache_data(show_spinner=False)
+def build_txt(template_choice, meta, keywords, headings, summary, article, faqs, examples):
+    return "".join(
+        [
+            "\nSEO Meta:\n", meta,
+            "\n\nSEO Keywords:\n", keywords,
+            "\n\nSuggested Headings:\n", headings,
+            "\n\nAI Overview Answer Summary:\n", summary,
+            "\n\nFull Article:\n", article,
+            "\n\nFAQs:\n", faqs,
+            f"\n\n{template_choice} Samples / Templates:\n" if examples else "", examples,
+            "\n",
+        ]
+    )
+
+
+@st.cache_data(show_spinner=False)
+def build_html(title, template_choice, meta, keywords, headings, summary, article, faqs, examples):
+    title = to_html(title, br=False)
+    return "".join(
+        [
+            HTML_HEAD, title, "</title>\n</head>\n<body>\n",
+            "<h1>", title, "</h1>\n\n",
+            "<h2>SEO Meta</h2>\n<p>", to_html(meta, br=False), "</p>\n\n",
+            "<h2>SEO Keywords</h2>\n<p>", to_html(keywords, br=False), "</p>\n\n",
+            "<h2>Suggested Headings</h2>\n<p>", to_html(headings), "</p>\n\n",
+            "<h2>AI Overview Answer Summary</h2>\n<p>", to_html(summary, br=False), "</p>\n\n",
+            "<h2>Full Article</h2>\n<p>", to_html(article), "</p>\n\n",
+            "<h2>FAQs</h2>\n<p>", to_html(faqs), "</p>\n\n",
+            f"<h2>{template_choice} Samples / Templates</h2>\n<p>{to_html(examples)}</p>\n\n"
+            if examples
+            else "",
+            HTML_CHECKLIST,
+        ]
+    )
+
+
+def render_generator(client, event_loop, topic, template_choice, custom_prompt, use_cache):
+    try:
+        planned = event_loop.run_until_complete(
+            plan_content(client, topic, template_choice, custom_prompt, use_cache)
+        )
+    except Exception as e:
+        st.error(f"⚠️ Error: {e}")
+        return
+    st.session_state["last_result"] = {
+        "key": (topic, template_choice, custom_prompt),
+        "planned": planned,
+    }
+    render_results(client, event_loop, planned, topic, template_choice, custom_prompt, use_cache)
+
+
+@st.fragment
+def render_results(client, event_loop, planned, topic, template_choice, custom_prompt, use_cache):
+    # Picking another title reruns only this fragment: the sidebar, form and title
+    # plan are left alone, and the plan already holds that title's short sections.
+    selected_title = st.selectbox("📝 Select Article Title", planned["titles"])
+    if not selected_title:
+        st.error("❌ No article titles were generated. Please try again.")
+        return
+
+    try:
+        result = event_loop.run_until_complete(
+            generate(
+                client,
+                planned,
+                selected_title,
+                topic,
+                template_choice,
+                custom_prompt,
+                use_cache,
+            )
+        )
+
+        st.subheader("✅ Content Quality Checklist")
+        st.write(
+            """
+            - [ ] Step 1: Research keywords  
+            - [ ] Step 2: Optimize headings & subheadings  
+            - [ ] Step 3: Add bullet points & checklists  
+            - [ ] Step 4: Include FAQs  
+            - [ ] Step 5: Review content for clarity & accuracy  
+            """
+        )
+
+        # -------------------------
+        # Download Buttons
+        # -------------------------
+        slug = slugify(topic)
+        # Payloads are built lazily, only when a button is clicked, and cached
+        # on the section strings so repeat downloads reuse them. Clicking doesn't
+        # rerun the app.
+        st.download_button(
+            label="💾 Download as TXT",
+            data=lambda: build_txt(
+                template_choice,
+                result["meta"],
+                result["keywords"],
+                result["headings"],
+                result["summary"],
+                result["article"],
+                result["faq"],
+                result["examples"],
+            ),
+            file_name=f"{slug}_SEO_Content.txt",
+            mime="text/plain",
+            on_click="ignore",
+        )
+        st.download_button(
+            label="💾 Download as HTML",
+            data=lambda: build_html(
+                result["title"],
+                template_choice,
+                result["meta"],
+                result["keywords"],
+                result["headings"],
+                result["summary"],
+                result["article"],
+                result["faq"],
+                result["examples"],
+            ),
+            file_name=f"{slug}_SEO_Content.html",
+            mime="text/html",
+            on_click="ignore",
+        )
+
+    except Exception as e:
+        st.error(f"⚠️ Error: {e}")
 
-SEO Keywords:
-{keywords_text}
 
-Suggested Headings:
-{headings_text}
+# -------------------------
+# Bulk Mode (OpenAI Batch API)
+# -------------------------
+async def warm_semantic_cache(client):
+    # Seed the semantic cache with every finished bulk topic using a single batched
+    # embeddings request, so later interactive runs on those topics skip the LLM.
+    texts, payloads = [], []
+    for index, bulk_topic in enumerate(st.session_state["bulk_topics"]):
+        bulk_sections = st.session_state["bulk_results"].get(index, {})
+        if all(name in bulk_sections for name in SECTION_ORDER):
+            texts.append(
+                semantic_key_text(
+                    bulk_topic,
+                    st.session_state["bulk_template"],
+                    st.session_state["bulk_custom_prompt"],
+                )
+            )
+            payloads.append(
+                {
+                    "titles": [bulk_topic],
+                    "selected_title": bulk_topic,
+                    "sections": [bulk_sections[name] for name in SECTION_ORDER],
+                }
+            )
+    if not texts:
+        return 0
+
+    semantic_store_many(await embed_many(client, texts), payloads)
+    return len(texts)
+
+
+def bulk_inputs_ok(client, bulk_topics):
+    if not client:
+        st.sidebar.error("❌ Please enter your OpenAI API key in the sidebar.")
+    elif not bulk_topics:
+        st.sidebar.error("❌ Please enter at least one topic.")
+    else:
+        return True
+    return False
 
-AI Overview Answer Summary:
-{ai_summary}
 
-Full Article:
-{article}
+def render_bulk_mode(client, event_loop, template_choice, custom_prompt, use_cache):
+    st.sidebar.subheader("📦 Bulk Mode")
+    bulk_topics_text = st.sidebar.text_area("Topics (one per line)", height=120)
+    bulk_topics = [t.strip() for t in bulk_topics_text.splitlines() if t.strip()]
 
-FAQs:
-{faq_text}
+    # Batch API: half price, results within 24h.
+    if st.sidebar.button("📤 Submit Batch"):
+        if bulk_inputs_ok(client, bulk_topics):
+            try:
+                # Remember the batch so reruns poll it instead of submitting again.
+                st.session_state["bulk_batch_id"] = event_loop.run_until_complete(
+                    submit_batch(client, bulk_topics, template_choice, custom_prompt)
+                )
+                st.session_state["bulk_topics"] = bulk_topics
+                st.session_state["bulk_template"] = template_choice
+                st.session_state["bulk_custom_prompt"] = custom_prompt
+                st.session_state.pop("bulk_results", None)
+            except Exception as e:
+                st.sidebar.error(f"⚠️ Error: {e}")
 
-{template_choice} Samples / Templates:
-{examples_text}
-"""
-                    st.download_button(
-                        label="💾 Download as TXT",
-                        data=download_content,
-                        file_name=f"{topic.replace(' ', '_')}_SEO_Content.txt",
-                        mime="text/plain"
+    # Interactive: every topic at once over the regular API, full price.
+    if st.sidebar.button("⚡ Generate Now"):
+        if bulk_inputs_ok(client, bulk_topics):
+            try:
+                with st.spinner(f"✨ Generating {len(bulk_topics)} topic(s)..."):
+                    bulk_results, bulk_errors = event_loop.run_until_complete(
+                        generate_many(
+                            client, bulk_topics, template_choice, custom_prompt, use_cache
+                        )
                     )
+                st.session_state["bulk_topics"] = bulk_topics
+                st.session_state["bulk_template"] = template_choice
+                st.session_state["bulk_custom_prompt"] = custom_prompt
+                st.session_state["bulk_results"] = bulk_results
+                st.session_state.pop("bulk_batch_id", None)
+                for index, message in bulk_errors.items():
+                    st.sidebar.warning(f"⚠️ {bulk_topics[index]}: {message}")
+            except Exception as e:
+                st.sidebar.error(f"⚠️ Error: {e}")
 
-                    html_content = f"""
-<html>
-<head>
-<meta charset="UTF-8">
-<title>{selected_title}</title>
-</head>
-<body>
-<h1>{selected_title}</h1>
-
-<h2>SEO Meta</h2>
-<p>{meta_text}</p>
+    bulk_batch_id = st.session_state.get("bulk_batch_id")
+    if bulk_batch_id and client:
+        st.sidebar.caption(f"Batch ID: {bulk_batch_id}")
+        if st.sidebar.button("🔄 Check Batch Status"):
+            try:
+                batch_status, batch_results, batch_errors = event_loop.run_until_complete(
+                    fetch_batch(client, bulk_batch_id)
+                )
+                st.sidebar.info(f"Batch status: {batch_status}")
+                if batch_results is not None:
+                    st.session_state["bulk_results"] = batch_results
+                    for index, bulk_topic in enumerate(st.session_state["bulk_topics"]):
+                        if index in batch_errors:
+                            st.sidebar.warning(f"⚠️ {bulk_topic}: {batch_errors[index]}")
+                        elif index not in batch_results:
+                            st.sidebar.warning(f"⚠️ {bulk_topic}: no result in the batch output.")
+            except Exception as e:
+                st.sidebar.error(f"⚠️ Error: {e}")
 
-<h2>SEO Keywords</h2>
-<p>{keywords_text}</p>
+    if st.session_state.get("bulk_results") and client:
+        if st.sidebar.button("🔥 Warm Cache With Bulk Results"):
+            try:
+                warmed = event_loop.run_until_complete(warm_semantic_cache(client))
+                st.sidebar.success(f"✅ Cached {warmed} topic(s).")
+            except Exception as e:
+                st.sidebar.error(f"⚠️ Error: {e}")
 
-<h2>Suggested Headings</h2>
-<p>{headings_text.replace('\n', '<br>')}</p>
+    if st.session_state.get("bulk_results"):
+        st.header("📦 Bulk Results")
+        for index, bulk_topic in enumerate(st.session_state["bulk_topics"]):
+            bulk_sections = st.session_state["bulk_results"].get(index, {})
+            with st.expander(bulk_topic):
+                for name, heading in SECTION_HEADINGS.items():
+                    # Empty sections (e.g. samples for NO_SAMPLES_TEMPLATES) get no heading.
+                    if bulk_sections.get(name):
+                        st.subheader(heading.format(template=st.session_state["bulk_template"]))
+                        st.markdown(bulk_sections[name])
 
-<h2>AI Overview Answer Summary</h2>
-<p>{ai_summary}</p>
 
-<h2>Full Article</h2>
-<p>{article.replace('\n', '<br>')}</p>
+# -------------------------
+# App UI
+# -------------------------
+api_key, use_cache = sidebar_api_key()
+client = get_client(api_key) if api_key else None
+event_loop = get_event_loop()
 
-<h2>FAQs</h2>
-<p>{faq_text.replace('\n', '<br>')}</p>
+st.title("📈 AI-Powered SEO Content Generator (India-Focused)")
+st.write("Generate SEO-ready articles with metadata, keywords, suggested headings, FAQs, and inline samples.")
 
-<h2>{template_choice} Samples / Templates</h2>
-<p>{examples_text.replace('\n', '<br>')}</p>
+# The template picker stays outside the form: it seeds the prompt text area below.
+template_choice = st.selectbox("📄 Choose Template", list(TEMPLATES.keys()))
 
-<h2>Checklist</h2>
-<ul>
-<li>Step 1: Research keywords</li>
-<li>Step 2: Optimize headings & subheadings</li>
-<li>Step 3: Add bullet points & checklists</li>
-<li>Step 4: Include FAQs</li>
-<li>Step 5: Review content for clarity & accuracy</li>
-</ul>
-</body>
-</html>
-"""
-                    st.download_button(
-                        label="💾 Download as HTML",
-                        data=html_content,
-                        file_name=f"{topic.replace(' ', '_')}_SEO_Content.html",
-                        mime="text/html"
-                    )
+# Typing in the form doesn't rerun the script; only the submit button does.
+with st.form("gen_form"):
+    topic = st.text_input("🎯 Enter Topic / Primary Keyword", "")
+    custom_prompt = st.text_area(
+        "✍️ Customize Prompt (optional)", value=TEMPLATES[template_choice], height=120
+    )
+    generate_button = st.form_submit_button("🚀 Generate Optimized Content")
 
-            except Exception as e:
-                st.error(f"⚠️ Error: {e}")
+last_result = st.session_state.get("last_result")
+if generate_button:
+    if not client:
+        st.error("❌ Please enter your OpenAI API key in the sidebar.")
+    elif not topic.strip():
+        st.error("❌ Please enter a topic/primary keyword.")
+    else:
+        render_generator(client, event_loop, topic, template_choice, custom_prompt, use_cache)
+elif last_result and last_result["key"] == (topic, template_choice, custom_prompt):
+    # Any other rerun (sidebar, bulk mode) shows the last results again from
+    # session_state, without a single API call.
+    render_results(
+        client, event_loop, last_result["planned"], topic, template_choice, custom_prompt, use_cache
+    )
+
+render_bulk_mode(client, event_loop, template_choice, custom_prompt, use_cache)
@@ -0,0 +1,676 @@
+import asyncio
+import hashlib
+import threading
+
+import diskcache
+import httpx
+import numpy as np
+import orjson
+import streamlit as st
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
+
+from prompts import (
+    NO_SAMPLES_TEMPLATES,
+    build_article_messages,
+    build_examples_messages,
+    build_plan_messages,
+    build_sections_messages,
+)
+
+MODEL = "gpt-4o-mini"
+
+# -------------------------
+# Client & Event Loop
+# -------------------------
+def get_client(api_key):
+    # Reuse one AsyncOpenAI client per session so its keep-alive pool (and TLS
+    # sessions) survive reruns. The pool is tied to this session's event loop,
+    # which is why it lives in session_state rather than st.cache_resource.
+    if st.session_state.get("aclient_key") != api_key:
+        st.session_state["aclient"] = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=2,
+            timeout=60.0,
+            # HTTP/2 multiplexes concurrent requests over one TCP+TLS connection.
+            http_client=DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            ),
+        )
+        st.session_state["aclient_key"] = api_key
+    return st.session_state["aclient"]
+
+
+def get_event_loop():
+    # The client's pool is bound to the loop it first ran on, so keep one loop per session.
+    if "event_loop" not in st.session_state:
+        st.session_state["event_loop"] = asyncio.new_event_loop()
+    return st.session_state["event_loop"]
+
+
+# -------------------------
+# Rate Limiting
+# -------------------------
+MAX_CONCURRENT_REQUESTS = 6
+CHAT_ATTEMPTS = 4
+# Longer rate-limit windows fail the run rather than stall it.
+RETRY_MAX_DELAY = 20.0
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def request_semaphore():
+    # Caps in-flight chat requests per session. asyncio primitives belong to one
+    # loop, so the semaphore lives in session_state next to the event loop.
+    if "api_semaphore" not in st.session_state:
+        st.session_state["api_semaphore"] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return st.session_state["api_semaphore"]
+
+
+def retry_delay(error, attempt):
+    # Prefer the server's retry-after (seconds); fall back to exponential backoff.
+    try:
+        delay = float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        delay = 2**attempt
+    return min(delay, RETRY_MAX_DELAY)
+
+
+async def chat_once(client, stream_to, **kwargs):
+    # Returns (text, finish_reason); "length" means the reply hit max_tokens.
+    if stream_to is None:
+        response = await client.chat.completions.create(**kwargs)
+        choice = response.choices[0]
+        return choice.message.content, choice.finish_reason
+
+    # Hand the growing text to stream_to as tokens arrive.
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    finish_reason = None
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        finish_reason = chunk.choices[0].finish_reason or finish_reason
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            stream_to("".join(parts))
+    return "".join(parts), finish_reason
+
+
+async def chat_with_retries(client, stream_to=None, **kwargs):
+    # The only retry layer for chat calls: SDK retries are switched off here so a 429
+    # isn't retried twice over. Each attempt holds a request slot; the backoff sleep
+    # happens outside it so waiting doesn't block other requests.
+    client = client.with_options(max_retries=0)
+    for attempt in range(CHAT_ATTEMPTS):
+        try:
+            async with request_semaphore():
+                return await chat_once(client, stream_to, **kwargs)
+        except RETRYABLE_ERRORS as e:
+            # An exhausted quota is also a 429, but waiting won't fix it.
+            if attempt == CHAT_ATTEMPTS - 1 or getattr(e, "code", None) == "insufficient_quota":
+                raise
+            delay = retry_delay(e, attempt)
+        await asyncio.sleep(delay)
+
+
+# -------------------------
+# Exact-Match Response Cache
+# -------------------------
+# On disk so cached completions survive Streamlit restarts, not just reruns.
+CACHE_DIR = ".llm_cache"
+CACHE_EXPIRE_SECONDS = 7 * 86400
+
+
+@st.cache_resource
+def response_cache():
+    # Shared by all sessions: request hash -> completion text (SQLite-backed, thread-safe).
+    return diskcache.Cache(CACHE_DIR, size_limit=2**30)
+
+
+def cache_key(model, messages, temperature, max_tokens, response_format=None):
+    payload = orjson.dumps(
+        {"m": model, "msgs": messages, "t": temperature, "mt": max_tokens, "rf": response_format},
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+async def cached_chat(
+    client,
+    model,
+    messages,
+    temperature,
+    max_tokens,
+    use_cache=True,
+    stream_to=None,
+    response_format=None,
+):
+    cache = response_cache()
+    key = cache_key(model, messages, temperature, max_tokens, response_format)
+    if use_cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    extra = {"response_format": response_format} if response_format else {}
+    content, finish_reason = await chat_with_retries(
+        client,
+        stream_to,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **extra,
+    )
+    if finish_reason == "length" and response_format:
+        raise ValueError(
+            f"The reply hit the {max_tokens}-token limit before its JSON was complete. "
+            "Please try again."
+        )
+    # Only finished replies are kept: a cut-off one would be served to every retry.
+    if finish_reason == "stop":
+        cache.set(key, content, expire=CACHE_EXPIRE_SECONDS)
+    return content
+
+
+def load_json_reply(content, request):
+    # request holds the cached_chat arguments that produced content.
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # Drop the entry so the next attempt asks the model again.
+        response_cache().delete(cache_key(**request))
+        raise ValueError("The model's reply was not valid JSON. Please try again.") from None
+
+
+async def complete(
+    client, messages, max_tokens, use_cache=True, show=None, stream=False, response_format=None
+):
+    content = await cached_chat(
+        client,
+        MODEL,
+        messages,
+        0.7,
+        max_tokens,
+        use_cache=use_cache,
+        stream_to=show if stream else None,
+        response_format=response_format,
+    )
+    if show:
+        show(content)
+    return content
+
+
+# -------------------------
+# Semantic Cache
+# -------------------------
+# Whole-pipeline results keyed by an embedding of the inputs, so reworded topics
+# ("data analyst resume" vs "resume for data analyst") still hit.
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+
+@st.cache_resource
+def semantic_cache():
+    # embedding hash -> payload, shared by all sessions and restarts. Bounded and
+    # expiring like the response cache; only the best match is ever read back.
+    return diskcache.Cache(f"{CACHE_DIR}/bundles", size_limit=2**30)
+
+
+@st.cache_resource
+def semantic_vectors():
+    # embedding hash -> unit embedding (6 KB each), kept apart from the payloads.
+    return diskcache.Cache(f"{CACHE_DIR}/bundle_vectors", size_limit=2**28)
+
+
+@st.cache_resource
+def semantic_index():
+    # All stored embeddings as one normalized matrix, read from disk once per process
+    # and then kept in step by semantic_store_many().
+    vectors = semantic_vectors()
+    keys, rows = [], []
+    for key in vectors:
+        row = vectors.get(key)
+        if row is not None:
+            keys.append(key)
+            rows.append(row)
+    return {
+        "lock": threading.Lock(),
+        "keys": keys,
+        "matrix": np.stack(rows) if rows else None,
+    }
+
+
+EMBEDDING_BATCH_SIZE = 2048  # max inputs per embeddings request
+
+
+def semantic_key_text(topic, template_choice, custom_prompt):
+    return f"{template_choice}\n{topic}\n{custom_prompt}"
+
+
+async def embed_many(client, texts):
+    # One round trip per 2048 texts instead of one per text.
+    embeddings = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = await client.embeddings.create(
+            model="text-embedding-3-small", input=texts[start : start + EMBEDDING_BATCH_SIZE]
+        )
+        embeddings.extend(
+            np.asarray(item.embedding, dtype=np.float32)
+            for item in sorted(response.data, key=lambda item: item.index)
+        )
+    return embeddings
+
+
+async def embed(client, text):
+    return (await embed_many(client, [text]))[0]
+
+
+def semantic_lookup(query):
+    index = semantic_index()
+    with index["lock"]:
+        keys, matrix = index["keys"], index["matrix"]
+    if matrix is None:
+        return None
+    sims = matrix @ (query / np.linalg.norm(query))
+    best = int(sims.argmax())
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    payload = semantic_cache().get(keys[best])
+    if payload is None:
+        # Expired or evicted: forget the row so it can't shadow other matches.
+        # Lists and matrix are replaced, never edited, so readers' snapshots stay valid.
+        with index["lock"]:
+            if keys[best] in index["keys"]:
+                row = index["keys"].index(keys[best])
+                index["keys"] = index["keys"][:row] + index["keys"][row + 1 :]
+                index["matrix"] = (
+                    np.delete(index["matrix"], row, axis=0) if index["keys"] else None
+                )
+    return payload
+
+
+def semantic_store_many(embeddings, payloads):
+    index = semantic_index()
+    bundles, vectors = semantic_cache(), semantic_vectors()
+    new_keys, new_rows = [], []
+    for embedding, payload in zip(embeddings, payloads):
+        key = hashlib.sha256(embedding.tobytes()).hexdigest()
+        row = (embedding / np.linalg.norm(embedding)).astype(np.float32)
+        bundles.set(key, payload, expire=CACHE_EXPIRE_SECONDS)
+        vectors.set(key, row, expire=CACHE_EXPIRE_SECONDS)
+        new_keys.append(key)
+        new_rows.append(row)
+
+    with index["lock"]:
+        # Keys hash the embedding, so a known key already has this exact row; skipping it
+        # keeps the matrix replace-only for lock-free readers. Repeats in one call collapse.
+        existing = set(index["keys"])
+        appended = {key: row for key, row in zip(new_keys, new_rows) if key not in existing}
+        appended_keys, appended_rows = list(appended), list(appended.values())
+        if appended_rows:
+            # One copy of the matrix per call, not per entry.
+            stacked = np.stack(appended_rows)
+            index["matrix"] = (
+                stacked if index["matrix"] is None else np.vstack([index["matrix"], stacked])
+            )
+            index["keys"] = index["keys"] + appended_keys
+
+
+def semantic_store(embedding, payload):
+    semantic_store_many([embedding], [payload])
+
+
+# -------------------------
+# Sections
+# -------------------------
+SECTION_ORDER = ["meta", "headings", "keywords", "summary", "article", "faq", "examples"]
+# Roughly the sum of the old per-section caps; a truncated reply is unparseable JSON.
+SECTIONS_MAX_TOKENS = 4096
+# Five titles' worth of meta, headings, keywords and summary plus the FAQs.
+PLAN_MAX_TOKENS = 4096
+ARTICLE_MAX_TOKENS = 1500
+EXAMPLES_MAX_TOKENS = 1200
+
+
+def string_array():
+    return {"type": "array", "items": {"type": "string"}}
+
+
+def strict_object(properties):
+    # Structured outputs' strict mode needs every key required and no extras.
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def faq_array():
+    return {
+        "type": "array",
+        "items": strict_object({"q": {"type": "string"}, "a": {"type": "string"}}),
+    }
+
+
+# Strict structured output for the plan, so titles and FAQs always arrive as objects.
+PLAN_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "plan",
+        "strict": True,
+        "schema": strict_object(
+            {
+                "titles": {
+                    "type": "array",
+                    "items": strict_object(
+                        {
+                            "title": {"type": "string"},
+                            "meta_title": {"type": "string"},
+                            "meta_description": {"type": "string"},
+                            "headings": string_array(),
+                            "keywords": string_array(),
+                            "ai_summary": {"type": "string"},
+                        }
+                    ),
+                },
+                "faqs": faq_array(),
+            }
+        ),
+    },
+}
+
+
+# Bulk mode gets a strict schema too, so headings, keywords and FAQs always arrive as arrays.
+SECTIONS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "sections",
+        "strict": True,
+        "schema": strict_object(
+            {
+                "meta_title": {"type": "string"},
+                "meta_description": {"type": "string"},
+                "headings": string_array(),
+                "keywords": string_array(),
+                "ai_summary": {"type": "string"},
+                "article_markdown": {"type": "string"},
+                "faqs": faq_array(),
+                "examples_markdown": {"type": "string"},
+            }
+        ),
+    },
+}
+
+
+def sections_from_json(data):
+    # Turn the JSON reply into the Markdown blocks the UI and downloads expect.
+    return {
+        "meta": f"Meta Title: {data.get('meta_title', '')}\n\n"
+        f"Meta Description: {data.get('meta_description', '')}",
+        "headings": "\n".join(f"- {heading}" for heading in data.get("headings", [])),
+        "keywords": ", ".join(data.get("keywords", [])),
+        "summary": data.get("ai_summary", ""),
+        "article": data.get("article_markdown", ""),
+        "faq": "\n\n".join(
+            f"**Q: {faq['q']}**\n\nA: {faq['a']}" for faq in data.get("faqs", [])
+        ),
+        "examples": data.get("examples_markdown", ""),
+    }
+
+
+# -------------------------
+# Generation
+# -------------------------
+async def generate_plan(client, topic, template_choice, custom_prompt, use_cache=True):
+    # 1. Five SERP-style titles, each with its meta, headings, keywords and summary,
+    # plus the topic FAQs: one short JSON round trip before the user picks a title.
+    request = {
+        "model": MODEL,
+        "messages": build_plan_messages(topic, template_choice, custom_prompt),
+        "temperature": 0.7,
+        "max_tokens": PLAN_MAX_TOKENS,
+        "response_format": PLAN_RESPONSE_FORMAT,
+    }
+    content = await cached_chat(client, use_cache=use_cache, **request)
+    plan = load_json_reply(content, request)
+    plan["titles"] = [
+        {**entry, "title": entry["title"].strip()}
+        for entry in plan["titles"]
+        if entry["title"].strip()
+    ]
+    if not plan["titles"]:
+        raise ValueError("The model returned no article titles. Please try again.")
+    return plan
+
+
+def plan_titles(plan):
+    return [entry["title"] for entry in plan["titles"]]
+
+
+def prefetch_examples(client, topic, template_choice, use_cache=True):
+    # 8. The samples depend only on topic and template, not on the title, so they can
+    # be requested alongside the plan and be ready (or in flight) once a title is picked.
+    if template_choice in NO_SAMPLES_TEMPLATES:
+        return None
+    return asyncio.create_task(
+        complete(
+            client,
+            build_examples_messages(topic, template_choice),
+            EXAMPLES_MAX_TOKENS,
+            use_cache=use_cache,
+        )
+    )
+
+
+async def plan_with_examples(client, topic, template_choice, custom_prompt, use_cache=True):
+    # The plan, with the samples requested alongside it. Returns (plan, examples_task);
+    # if planning fails the task is cancelled rather than left running unobserved.
+    examples_task = prefetch_examples(client, topic, template_choice, use_cache)
+    try:
+        plan = await generate_plan(client, topic, template_choice, custom_prompt, use_cache)
+    except BaseException:
+        if examples_task:
+            examples_task.cancel()
+        raise
+    return plan, examples_task
+
+
+async def show_when_done(task, show):
+    content = await task
+    show(content)
+    return content
+
+
+async def generate_sections(
+    client,
+    plan,
+    topic,
+    title,
+    template_choice,
+    custom_prompt,
+    shows,
+    use_cache=True,
+    examples_task=None,
+):
+    # 2–5, 7. Index the plan for the selected title: no further calls for these.
+    entry = next((entry for entry in plan["titles"] if entry["title"] == title), {})
+    sections = sections_from_json({**entry, "faqs": plan.get("faqs", [])})
+    for name in ("meta", "headings", "keywords", "summary", "faq"):
+        shows[name](sections[name])
+
+    # 6, 8. Only the long-form parts remain; the article streams while the samples
+    # either finish their prefetch or stream alongside it.
+    article = complete(
+        client,
+        build_article_messages(
+            topic, title, sections["headings"], template_choice, custom_prompt
+        ),
+        ARTICLE_MAX_TOKENS,
+        use_cache=use_cache,
+        show=shows["article"],
+        stream=True,
+    )
+    if template_choice in NO_SAMPLES_TEMPLATES:
+        sections["article"], sections["examples"] = await article, ""
+        return sections
+    if examples_task is None:
+        examples = complete(
+            client,
+            build_examples_messages(topic, template_choice),
+            EXAMPLES_MAX_TOKENS,
+            use_cache=use_cache,
+            show=shows["examples"],
+            stream=True,
+        )
+    else:
+        examples = show_when_done(examples_task, shows["examples"])
+    sections["article"], sections["examples"] = await asyncio.gather(article, examples)
+    return sections
+
+
+async def generate_all(
+    client, topic, template_choice, custom_prompt, selected_title=None, use_cache=True
+):
+    # The whole run without any UI: plan, then the sections for selected_title (or the
+    # first planned title). Returns {"title", "titles", and one key per section}.
+    plan, examples_task = await plan_with_examples(
+        client, topic, template_choice, custom_prompt, use_cache
+    )
+    titles = plan_titles(plan)
+    title = selected_title or titles[0]
+    sections = await generate_sections(
+        client,
+        plan,
+        topic,
+        title,
+        template_choice,
+        custom_prompt,
+        dict.fromkeys(SECTION_ORDER, lambda text: None),
+        use_cache,
+        examples_task,
+    )
+    return {"title": title, "titles": titles, **sections}
+
+
+# -------------------------
+# Bulk Mode
+# -------------------------
+# Bulk topics have no interactive title step, so each topic is its own title and
+# every section comes from one request, whether sent now or through the Batch API.
+def bulk_request_body(bulk_topic, template_choice, custom_prompt):
+    return {
+        "model": MODEL,
+        "messages": build_sections_messages(
+            bulk_topic, bulk_topic, template_choice, custom_prompt
+        ),
+        "temperature": 0.7,
+        "max_tokens": SECTIONS_MAX_TOKENS,
+        "response_format": SECTIONS_RESPONSE_FORMAT,
+    }
+
+
+async def generate_bulk_topic(client, bulk_topic, template_choice, custom_prompt, use_cache=True):
+    request = bulk_request_body(bulk_topic, template_choice, custom_prompt)
+    content = await cached_chat(client, use_cache=use_cache, **request)
+    return sections_from_json(load_json_reply(content, request))
+
+
+async def generate_many(client, topics, template_choice, custom_prompt, use_cache=True):
+    # Every topic runs at once at full price; request_semaphore() keeps the in-flight
+    # calls bounded. Returns ({index: sections}, {index: error message}).
+    outcomes = await asyncio.gather(
+        *(
+            generate_bulk_topic(client, bulk_topic, template_choice, custom_prompt, use_cache)
+            for bulk_topic in topics
+        ),
+        return_exceptions=True,
+    )
+    results, errors = {}, {}
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            errors[index] = str(outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[index] = outcome
+    return results, errors
+
+
+# Through the Batch API: half the cost and no client-side fan-out.
+async def submit_batch(client, topics, template_choice, custom_prompt):
+    lines = []
+    for index, bulk_topic in enumerate(topics):
+        lines.append(
+            orjson.dumps(
+                {
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": bulk_request_body(bulk_topic, template_choice, custom_prompt),
+                }
+            )
+        )
+
+    batch_file = await client.files.create(
+        file=("bulk_requests.jsonl", b"\n".join(lines)), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def batch_record_sections(record):
+    # One output- or error-file line -> sections; raises ValueError saying why it failed.
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    if response.get("status_code") != 200:
+        error = record.get("error") or body.get("error") or {}
+        raise ValueError(
+            error.get("message") or f"Request failed with status {response.get('status_code')}."
+        )
+    choice = body["choices"][0]
+    if choice.get("finish_reason") == "length":
+        raise ValueError("The reply hit the token limit before its JSON was complete.")
+    try:
+        data = orjson.loads(choice["message"]["content"])
+    except orjson.JSONDecodeError:
+        raise ValueError("The model's reply was not valid JSON.") from None
+    return sections_from_json(data)
+
+
+async def fetch_batch(client, batch_id):
+    # Returns (status, {index: sections} or None until completed, {index: error message}).
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        return batch.status, None, {}
+
+    results, errors = {}, {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        output = await client.files.content(file_id)
+        for line in output.content.splitlines():
+            # One bad line costs only its own topic; the app reports topics with no result.
+            try:
+                record = orjson.loads(line)
+                index = int(record["custom_id"])
+            except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+            try:
+                results[index] = batch_record_sections(record)
+            except ValueError as e:
+                errors[index] = str(e)
+            except (AttributeError, IndexError, KeyError, TypeError):
+                errors[index] = "The batch returned a malformed result."
+    return batch.status, results, errors
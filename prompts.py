@@ -0,0 +1,158 @@
+# Prompt text and message builders. Everything static stays byte-identical between
+# requests so OpenAI's prefix-keyed prompt cache can reuse it.
+TEMPLATES = {
+    "Resume": "Write an article with resume writing guide, inline resume samples, and FAQs.",
+    "Cover Letter": "Write a cover letter guide with inline cover letter samples, templates, and FAQs.",
+    "Generic": "Generate a comprehensive, well-structured article with examples and FAQs.",
+    "How to Become": "Write a step-by-step guide on how to become [ROLE], with skills, salary insights, and FAQs.",
+    "Job Description": "Write a detailed job description with structured inline sections, India-specific examples, and salary insights.",
+}
+
+# Static per template, so the whole system message is a cacheable prefix.
+EXAMPLES_INSTRUCTIONS = {
+    "Resume": """Generate 3 detailed resume samples for the topic.
+Use fixed inline headings:
+
+### Fresher Resume Sample
+[Full fresher resume]
+
+### Mid-level Resume Sample
+[Full mid-level resume]
+
+### Experienced Resume Sample
+[Full experienced resume]
+
+Context: Indian job market.""",
+    "Cover Letter": """Generate 3 detailed cover letter samples for the topic.
+Use fixed inline headings:
+
+### Fresher Cover Letter Sample
+[Full fresher cover letter]
+
+### Mid-level Cover Letter Sample
+[Full mid-level cover letter]
+
+### Experienced Cover Letter Sample
+[Full experienced cover letter]
+
+Context: Indian job market.""",
+    "Job Description": """Generate a detailed Job Description for the topic.
+Use these fixed inline headings:
+
+### Job Title
+[Insert job title]
+
+### Job Summary
+[Short overview]
+
+### Key Responsibilities
+[6–8 bullet points]
+
+### Required Skills & Qualifications
+[Technical + soft skills, education]
+
+### Salary Insights (India-specific)
+[Fresher / Mid-level / Experienced INR ranges]
+
+### About the Company (Optional)
+[Sample company description, India-focused]""",
+}
+# The Generic article already asks for examples; a separate samples call would repeat it.
+NO_SAMPLES_TEMPLATES = {"Generic"}
+DEFAULT_EXAMPLES_INSTRUCTIONS = 'Generate 3–4 distinct examples for the template "{template}" on the topic.'
+
+# Shared by every request, so the style rules are stated once and every system
+# message starts with the same bytes.
+SYSTEM_PREAMBLE = """You write SEO content for Indian readers. Everything must be human-like, plagiarism-free and India-focused.
+
+"""
+
+SECTIONS_INSTRUCTIONS = """For the topic (primary keyword) and article title given by the user, return a JSON object with these keys:
+- "meta_title": SEO meta title, ≤60 characters, engaging
+- "meta_description": SEO meta description, ≤160 characters, concise, includes the primary keyword
+- "headings": array of suggested H2 and H3 headings, structured for SEO; use the primary keyword in at least one heading and include India-specific examples where relevant
+- "keywords": array of 5–10 SEO keywords: primary, secondary and long-tail, India-specific
+- "ai_summary": concise, direct answer summary of 50–80 words
+- "article_markdown": detailed article in Markdown with a clear introduction, structured subheadings, examples and FAQs, bullet points or checklists; follow the user's style notes
+- "faqs": array of 5–7 objects {"q": ..., "a": ...} with concise, actionable answers
+- "examples_markdown": the samples described below, in Markdown; an empty string if none are described
+
+Template:
+"""
+
+PLAN_INSTRUCTIONS = """For the topic (primary keyword) given by the user, plan the content and return a JSON object with these keys:
+- "titles": array of exactly 5 objects, one per SEO-friendly article title. Titles must mimic top-ranking Google SERPs and be concise, engaging and India-specific. Each object has:
+  - "title": the article title
+  - "meta_title": SEO meta title, ≤60 characters, engaging
+  - "meta_description": SEO meta description, ≤160 characters, concise, includes the primary keyword
+  - "headings": array of 6–8 suggested H2 and H3 headings for that title; use the primary keyword in at least one heading and include India-specific examples where relevant
+  - "keywords": array of 5–10 SEO keywords: primary, secondary and long-tail, India-specific
+  - "ai_summary": concise, direct answer summary of 50–80 words for that title
+- "faqs": array of 5–7 objects {"q": ..., "a": ...} for the topic, with concise, actionable answers
+
+Template:
+"""
+
+ARTICLE_INSTRUCTIONS = """Generate a detailed article on the topic with the title given by the user.
+Requirements:
+- Clear introduction
+- Structured subheadings, following the suggested headings
+- Examples and FAQs
+- Bullet points or checklists
+- Follow the user's style notes
+
+Template:
+"""
+
+EXAMPLES_SYSTEM = "The samples are for Indian job seekers and employers. Output Markdown only."
+
+
+def system_message(instructions):
+    return {"role": "system", "content": SYSTEM_PREAMBLE + instructions}
+
+
+def build_plan_messages(topic, template_choice, custom_prompt):
+    # Titles plus the short per-title sections, so picking a title needs no new request.
+    return [
+        system_message(PLAN_INSTRUCTIONS + TEMPLATES[template_choice]),
+        {"role": "user", "content": f'Topic: "{topic}"\nStyle: {custom_prompt}'},
+    ]
+
+
+def build_article_messages(topic, title, headings, template_choice, custom_prompt):
+    return [
+        system_message(ARTICLE_INSTRUCTIONS + TEMPLATES[template_choice]),
+        {
+            "role": "user",
+            "content": f'Topic: "{topic}"\nTitle: "{title}"\n'
+            f"Suggested headings:\n{headings}\nStyle: {custom_prompt}",
+        },
+    ]
+
+
+def build_examples_messages(topic, template_choice):
+    examples = EXAMPLES_INSTRUCTIONS.get(
+        template_choice, DEFAULT_EXAMPLES_INSTRUCTIONS.format(template=template_choice)
+    )
+    return [
+        system_message(f"{EXAMPLES_SYSTEM}\n\n{examples}"),
+        {"role": "user", "content": f'Topic: "{topic}"'},
+    ]
+
+
+def build_sections_messages(topic, title, template_choice, custom_prompt):
+    # Bulk mode: every section of a topic in one request.
+    if template_choice in NO_SAMPLES_TEMPLATES:
+        samples = ""
+    else:
+        examples = EXAMPLES_INSTRUCTIONS.get(
+            template_choice, DEFAULT_EXAMPLES_INSTRUCTIONS.format(template=template_choice)
+        )
+        samples = f"\n\nSamples:\n{examples}"
+    return [
+        system_message(f"{SECTIONS_INSTRUCTIONS}{TEMPLATES[template_choice]}{samples}"),
+        {
+            "role": "user",
+            "content": f'Topic: "{topic}"\nTitle: "{title}"\nStyle: {custom_prompt}',
+        },
+    ]